@@ -23,30 +23,145 @@ Notes:
   in mountainous areas. You can customize thresholds below.
 """
 
+import functools
+import hashlib
 import os
+import re
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import requests
 import streamlit as st
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional speedup — stdlib json is the fallback
+    orjson = None
+
+try:
+    import httpx
+    import h2  # noqa: F401 — httpx only imports the http2 extra lazily at
+    # request time, so probe it here or the requests fallback never engages
+except ImportError:  # optional HTTP/2 path — plain requests is the fallback
+    httpx = None
 
 load_dotenv()  # loads .env if present
 
 # -------------------------
 # Config / thresholds
 # -------------------------
-OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "").strip()
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Immutable app configuration; slots keep attribute access cheap."""
+    # OpenWeatherMap API key from the environment (may be blank)
+    owm_key: str
+    # Elevation threshold (meters) above which we label location as mountainous
+    elev_thresh: int = 1000
+    # Wind (m/s) threshold for "strong wind"
+    wind_thresh: float = 10.0
+    # Rain or snow volume threshold (mm in last 1h) considered significant if API returns it
+    precip_thresh: float = 0.1
+
+@st.cache_resource
+def get_config():
+    """
+    Parse env config once per process instead of on every Streamlit rerun.
+    """
+    return Config(owm_key=os.getenv("OPENWEATHER_API_KEY", "").strip())
 
-# Elevation threshold (meters) above which we label location as mountainous
-ELEVATION_MOUNTAIN_THRESHOLD = 1000
+CFG = get_config()
 
-# Wind (m/s) threshold for "strong wind"
-WIND_STRONG_THRESHOLD = 10.0
+# -------------------------
+# HTTP client (shared, pooled)
+# -------------------------
+# No Connection header here: connection-specific headers are forbidden in
+# HTTP/2 and h2 rejects them on send. The requests fallback adds it below.
+_HTTP_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "TripRisk/1.0",
+}
+
+# Status/transport errors raised by whichever client is in use
+_HTTP_ERRORS = (requests.HTTPError,) if httpx is None else (requests.HTTPError, httpx.HTTPError)
+
+@st.cache_resource
+def _get_client():
+    """
+    Build one HTTP client shared across Streamlit reruns. Prefers httpx with
+    HTTP/2, which multiplexes concurrent calls to the same host over a single
+    TLS connection; falls back to a pooled requests.Session (with retries on
+    transient 5xx) when httpx or its h2 extra isn't installed. Both expose
+    the same get/post/head surface, so callers don't care which they got.
+    """
+    if httpx is not None:
+        session = httpx.Client(
+            timeout=10.0,
+            headers=_HTTP_HEADERS,
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
+            ),
+        )
+    else:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+        )
+        session.mount("https://", adapter)
+        session.headers.update(_HTTP_HEADERS)
+        session.headers["Connection"] = "keep-alive"  # harmless on HTTP/1.1
+
+    def _warm():
+        # Prime the pool with an uncritical request per API host so the
+        # first real fetch finds an open connection and skips the TCP/TLS
+        # handshakes ("first click is slow" otherwise).
+        for host in (
+            "https://api.openweathermap.org/",
+            "https://api.open-elevation.com/",
+            "https://api.open-meteo.com/",
+        ):
+            try:
+                session.head(host, timeout=5)
+            except Exception:
+                pass
+
+    threading.Thread(target=_warm, daemon=True).start()
+    return session
+
+_CLIENT = _get_client()
+
+@st.cache_resource
+def _get_executor():
+    """
+    Small thread pool for firing independent API calls in parallel. The
+    pooled client above is thread-safe, so both workers reuse its
+    keep-alive connections.
+    """
+    return ThreadPoolExecutor(max_workers=2)
 
-# Rain or snow volume threshold (mm in last 1h) considered significant if API returns it
-PRECIP_THRESHOLD_MM = 0.1
+_EXECUTOR = _get_executor()
 
 # -------------------------
 # Helpers: External APIs
 # -------------------------
+def _parse_json(r):
+    """
+    Decode a response body. orjson parses the raw bytes in C when installed;
+    otherwise fall back to requests' stdlib-based .json().
+    """
+    if orjson is not None:
+        return orjson.loads(r.content)
+    return r.json()
+
 def fetch_weather_by_coords(lat, lon, api_key):
     """
     Uses OpenWeatherMap current weather API. Returns dict or raises on failure.
@@ -58,9 +173,9 @@ def fetch_weather_by_coords(lat, lon, api_key):
         "appid": api_key,
         "units": "metric",
     }
-    r = requests.get(base, params=params, timeout=10)
+    r = _CLIENT.get(base, params=params, timeout=10)
     r.raise_for_status()
-    return r.json()
+    return _parse_json(r)
 
 def fetch_weather_by_city(city_name, api_key):
     base = "https://api.openweathermap.org/data/2.5/weather"
@@ -69,38 +184,282 @@ def fetch_weather_by_city(city_name, api_key):
         "appid": api_key,
         "units": "metric",
     }
-    r = requests.get(base, params=params, timeout=10)
+    r = _CLIENT.get(base, params=params, timeout=10)
     r.raise_for_status()
-    return r.json()
+    return _parse_json(r)
 
-def fetch_elevation(lat, lon):
+def fetch_elevations(points):
     """
-    Query a free elevation API. Returns elevation in meters or None on failure.
-    Uses open-elevation (public).
+    Query elevations for a list of (lat, lon) tuples in one POST to
+    open-elevation (the batch endpoint takes up to ~100 locations).
+    Returns a list of elevations in meters, None per point on failure —
+    so a future multi-waypoint route costs one round trip, not N.
     """
     try:
         url = "https://api.open-elevation.com/api/v1/lookup"
-        params = {"locations": f"{lat},{lon}"}
-        r = requests.get(url, params=params, timeout=8)
+        body = {"locations": [{"latitude": la, "longitude": lo} for la, lo in points]}
+        r = _CLIENT.post(url, json=body, timeout=15)
         r.raise_for_status()
-        data = r.json()
-        if "results" in data and len(data["results"]) > 0:
-            return data["results"][0].get("elevation")
+        data = _parse_json(r)
+        results = data.get("results", [])
+        if len(results) == len(points):
+            return [res.get("elevation") for res in results]
     except Exception:
-        return None
-    return None
+        pass
+    return [None] * len(points)
+
+def fetch_elevation(lat, lon):
+    """
+    Single-point convenience wrapper around fetch_elevations.
+    Returns elevation in meters or None on failure.
+    """
+    return fetch_elevations([(lat, lon)])[0]
+
+# Open-Meteo WMO weather codes mapped into OWM-style (main, description)
+_WMO_MAIN = {
+    0: ("clear", "clear sky"),
+    1: ("clouds", "mainly clear"),
+    2: ("clouds", "partly cloudy"),
+    3: ("clouds", "overcast"),
+    45: ("fog", "fog"),
+    48: ("fog", "depositing rime fog"),
+    51: ("drizzle", "light drizzle"),
+    53: ("drizzle", "drizzle"),
+    55: ("drizzle", "dense drizzle"),
+    56: ("drizzle", "freezing drizzle"),
+    57: ("drizzle", "dense freezing drizzle"),
+    61: ("rain", "slight rain"),
+    63: ("rain", "rain"),
+    65: ("rain", "heavy rain"),
+    66: ("rain", "freezing rain"),
+    67: ("rain", "heavy freezing rain"),
+    71: ("snow", "slight snowfall"),
+    73: ("snow", "snowfall"),
+    75: ("snow", "heavy snowfall"),
+    77: ("snow", "snow grains"),
+    80: ("rain", "rain showers"),
+    81: ("rain", "moderate rain showers"),
+    82: ("rain", "violent rain showers"),
+    85: ("snow", "snow showers"),
+    86: ("snow", "heavy snow showers"),
+    95: ("thunderstorm", "thunderstorm"),
+    96: ("thunderstorm", "thunderstorm with hail"),
+    99: ("thunderstorm", "thunderstorm with heavy hail"),
+}
+
+def fetch_weather_and_elevation_openmeteo(lat, lon):
+    """
+    Fetch current weather AND site elevation from Open-Meteo in a single
+    round trip (no API key needed). Returns (weather_json, elevation) with
+    weather_json adapted to the OWM dict shape analyze_risk expects.
+    """
+    base = "https://api.open-meteo.com/v1/forecast"
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "current_weather": "true",
+        "windspeed_unit": "ms",
+        "hourly": "precipitation,snowfall",
+        "forecast_days": 1,
+    }
+    r = _CLIENT.get(base, params=params, timeout=10)
+    r.raise_for_status()
+    data = _parse_json(r)
+
+    current = data.get("current_weather", {})
+    main, desc = _WMO_MAIN.get(current.get("weathercode"), ("", ""))
+
+    # Align the hourly precipitation series with the current observation hour.
+    rain_1h = 0.0
+    snow_1h = 0.0
+    hourly = data.get("hourly", {})
+    times = hourly.get("time", [])
+    now_hour = (current.get("time") or "")[:13]  # e.g. "2026-08-26T14"
+    for i, t in enumerate(times):
+        if t[:13] == now_hour:
+            rain_1h = hourly.get("precipitation", [])[i] or 0.0
+            snow_1h = (hourly.get("snowfall", [])[i] or 0.0) * 10.0  # cm -> mm
+            break
+
+    weather_json = {
+        "weather": [{"main": main, "description": desc}],
+        "main": {"temp": current.get("temperature")},
+        "wind": {"speed": current.get("windspeed", 0.0)},
+        "rain": {"1h": rain_1h},
+        "snow": {"1h": snow_1h},
+    }
+    return weather_json, data.get("elevation")
+
+# Plain decimal number, e.g. "35.2137" or "-75"
+_NUM_RE = re.compile(r"^[+-]?\d+(?:\.\d+)?$")
+
+def _parse_float(s):
+    """
+    Parse a decimal string to float without exception control flow.
+    Returns None for anything that isn't a plain signed decimal.
+    """
+    s = s.strip()
+    return float(s) if _NUM_RE.match(s) else None
+
+# OWM refreshes roughly every 10 minutes on the free tier; both the weather
+# caches and the per-session memo expire on this horizon.
+_WEATHER_TTL_S = 600
+
+def _key_fingerprint(api_key):
+    """Short stable digest of the API key so the raw key never lands in a cache key."""
+    return hashlib.sha1(api_key.encode()).hexdigest()[:8]
+
+@st.cache_data(ttl=_WEATHER_TTL_S, show_spinner=False)
+def _cached_weather_coords(lat_r, lon_r, key_fp, _api_key):
+    """
+    Weather keyed on coordinates rounded to 2 decimals (~1 km, well inside
+    OWM's native resolution) plus a key fingerprint. The raw key is
+    underscore-prefixed so Streamlit leaves it out of the cache key.
+    """
+    return fetch_weather_by_coords(lat_r, lon_r, _api_key)
+
+@st.cache_data(ttl=_WEATHER_TTL_S, show_spinner=False)
+def _cached_weather_city(city_norm, key_fp, _api_key):
+    """Same as _cached_weather_coords, keyed on the normalized city name."""
+    return fetch_weather_by_city(city_norm, _api_key)
+
+@st.cache_data(ttl=30 * 24 * 3600, max_entries=4096, show_spinner=False)
+def _cached_elevation(lat_r, lon_r):
+    """
+    Elevation keyed on coordinates rounded to 3 decimals (~110 m grid).
+    Terrain doesn't change, so hits skip the open-elevation round trip and
+    are shared across sessions.
+    """
+    return fetch_elevation(lat_r, lon_r)
 
 # -------------------------
 # Risk logic
 # -------------------------
-def analyze_risk(weather_json, is_mountainous):
+# OWM's "main" field is a small fixed enumeration — dispatch it to a risk
+# tag with one dict lookup instead of a chain of string comparisons.
+_MAIN_DISPATCH = {
+    "thunderstorm": "storm",
+    "tornado": "storm",
+    "squall": "wind",
+    "drizzle": "rain",
+    "rain": "rain",
+    "snow": "snow",
+    "clear": "clear",
+    "clouds": "",
+    "mist": "",
+    "smoke": "",
+    "haze": "",
+    "dust": "",
+    "fog": "",
+    "sand": "",
+    "ash": "",
+}
+
+# Condition vocabularies, matched as whole words against the free-text
+# description. One split + set intersections replaces the old pile of
+# substring scans.
+_RAIN_TOKENS = frozenset({"rain", "shower", "drizzle"})
+_SNOW_TOKENS = frozenset({"snow", "sleet", "blizzard"})
+_STORM_TOKENS = frozenset({"thunder", "thunderstorm", "storm", "squall"})
+
+# Scoring rules: (condition key, base weight, reason template). Keeping the
+# table at module scope means one pass over precomputed flags per call, and
+# the same table can score a whole forecast timeline if the app grows one.
+_RULES = (
+    ("rain", 2, "Precipitation detected (rain ~ {} mm in last hour)."),
+    ("snow", 3, "Snow detected (snow ~ {} mm in last hour)."),
+    ("wind", 2, "Strong wind (~{} m/s)."),
+    ("cold", 1.5, "Low temperature ({} °C)."),
+    ("storm", 3, "Thunderstorm / storm conditions reported: {}."),
+)
+
+# Demo sample weather JSON (sunny mountain example) — built once and
+# wrapped read-only so demo reruns share it instead of rebuilding dicts.
+_DEMO_WEATHER = types.MappingProxyType({
+    "weather": [types.MappingProxyType({"main": "Clear", "description": "clear sky"})],
+    "main": types.MappingProxyType({"temp": 4.5}),
+    "wind": types.MappingProxyType({"speed": 3.2}),
+    "rain": {},
+    "snow": {},
+})
+_DEMO_ELEVATION = 3200  # sample mountain elevation
+
+# Advice per risk level — immutable, so one shared tuple per level instead
+# of rebuilding the lists on every analyze_risk call.
+_ADVICE_HIGH = (
+    "Avoid travel if possible — high risk conditions for mountain areas.",
+    "Postpone the trip or choose a lower-altitude route.",
+    "If travel is necessary, carry warm waterproof gear, inform someone, and have emergency kit.",
+)
+_ADVICE_MEDIUM = (
+    "Caution advised. Conditions may be risky, especially on exposed or steep terrain.",
+    "Check local forecasts and consider delaying if the weather worsens.",
+    "Bring waterproof layers, navigation, and an emergency plan.",
+)
+_ADVICE_LOW = (
+    "Conditions appear OK for trips, but weather can change rapidly in mountains.",
+    "Bring layers, sun protection, and check updates before leaving.",
+)
+
+@functools.lru_cache(maxsize=256)
+def _compute_risk(weather_main, weather_desc, temp_c, wind_speed, rain_1h, snow_1h, is_mountainous, cfg):
     """
-    Very simple rule-based risk assessment for mountain trips.
-    Returns dict: {risk_level, reasons(list), advice(list)}
+    Pure, hashable-argument core of the risk assessment. Deterministic given
+    its scalars, so lru_cache makes repeat evaluations (e.g. Streamlit reruns
+    after toggling an unrelated widget) O(1). Returns (risk_score, reasons)
+    with reasons as a tuple.
     """
     reasons = []
-    advice = []
 
+    # Basic flags — one dict lookup on the main category, plus a single
+    # tokenization of the description with O(1) vocabulary lookups.
+    main_tag = _MAIN_DISPATCH.get(weather_main, "")
+    cond_tokens = set(weather_desc.replace(",", " ").split())
+    has_rain = (main_tag == "rain") or bool(cond_tokens & _RAIN_TOKENS) or (rain_1h >= cfg.precip_thresh)
+    has_snow = (main_tag == "snow") or bool(cond_tokens & _SNOW_TOKENS) or (snow_1h >= cfg.precip_thresh)
+    is_windy = (wind_speed >= cfg.wind_thresh) or (main_tag == "wind")
+    is_cold = (temp_c is not None) and (temp_c <= 0)
+    has_storm = (main_tag == "storm") or bool(cond_tokens & _STORM_TOKENS)
+
+    # Evaluate risk
+    risk_score = 0
+    # Mountainous multiplies risk
+    if is_mountainous:
+        risk_weight = 2.0
+    else:
+        risk_weight = 1.0
+
+    # Condition flags keyed the way _RULES expects, paired with the value
+    # shown in the reason. Reasons are only formatted for rules that fired.
+    flags = {
+        "rain": (has_rain, rain_1h),
+        "snow": (has_snow, snow_1h),
+        "wind": (is_windy, wind_speed),
+        "cold": (is_cold, temp_c),
+        "storm": (has_storm, weather_desc),
+    }
+    for key, weight, template in _RULES:
+        triggered, value = flags[key]
+        if not triggered:
+            continue
+        reasons.append(template.format(value))
+        risk_score += weight * risk_weight
+        if is_mountainous and risk_score >= 6 and len(reasons) >= 3:
+            # Already firmly in "High" for a mountain trip with enough
+            # reasons to explain it — no need to keep evaluating rules.
+            # Lowland assessments run the full set so the diagnostics stay
+            # complete.
+            break
+    if main_tag == "clear" and not reasons:
+        reasons.append("Clear conditions currently.")
+
+    return risk_score, tuple(reasons)
+
+def analyze_risk(weather_json, is_mountainous, cfg=CFG):
+    """
+    Very simple rule-based risk assessment for mountain trips.
+    Returns dict: {risk_level, reasons(list), advice(list)}
+    """
     # Parse common fields with safe fallbacks
     weather_main = ""
     weather_desc = ""
@@ -117,59 +476,21 @@ def analyze_risk(weather_json, is_mountainous):
     if "snow" in weather_json:
         snow_1h = weather_json["snow"].get("1h", 0.0)
 
-    # Basic flags
-    has_rain = ("rain" in weather_main) or (rain_1h >= PRECIP_THRESHOLD_MM) or ("shower" in weather_desc)
-    has_snow = ("snow" in weather_main) or (snow_1h >= PRECIP_THRESHOLD_MM)
-    is_windy = wind_speed >= WIND_STRONG_THRESHOLD
-    is_cold = (temp_c is not None) and (temp_c <= 0)
-
-    # Evaluate risk
-    risk_score = 0
-    # Mountainous multiplies risk
-    if is_mountainous:
-        risk_weight = 2.0
-    else:
-        risk_weight = 1.0
-
-    if has_rain:
-        reasons.append(f"Precipitation detected (rain ~ {rain_1h} mm in last hour).")
-        risk_score += 2 * risk_weight
-    if has_snow:
-        reasons.append(f"Snow detected (snow ~ {snow_1h} mm in last hour).")
-        risk_score += 3 * risk_weight
-    if is_windy:
-        reasons.append(f"Strong wind (~{wind_speed} m/s).")
-        risk_score += 2 * risk_weight
-    if is_cold:
-        reasons.append(f"Low temperature ({temp_c} °C).")
-        risk_score += 1.5 * risk_weight
-    if "thunder" in weather_desc or "storm" in weather_desc:
-        reasons.append(f"Thunderstorm / storm conditions reported: {weather_desc}.")
-        risk_score += 3 * risk_weight
-    if weather_main == "clear" and not (has_rain or has_snow or is_windy or is_cold):
-        reasons.append("Clear conditions currently.")
+    risk_score, reasons = _compute_risk(
+        weather_main, weather_desc, temp_c, wind_speed, rain_1h, snow_1h, is_mountainous, cfg
+    )
+    reasons = list(reasons)  # the cached tuple stays immutable
 
     # Convert risk_score to category
     if risk_score >= 6:
         level = "High"
-        advice = [
-            "Avoid travel if possible — high risk conditions for mountain areas.",
-            "Postpone the trip or choose a lower-altitude route.",
-            "If travel is necessary, carry warm waterproof gear, inform someone, and have emergency kit."
-        ]
+        advice = _ADVICE_HIGH
     elif risk_score >= 2.5:
         level = "Medium"
-        advice = [
-            "Caution advised. Conditions may be risky, especially on exposed or steep terrain.",
-            "Check local forecasts and consider delaying if the weather worsens.",
-            "Bring waterproof layers, navigation, and an emergency plan."
-        ]
+        advice = _ADVICE_MEDIUM
     else:
         level = "Low"
-        advice = [
-            "Conditions appear OK for trips, but weather can change rapidly in mountains.",
-            "Bring layers, sun protection, and check updates before leaving."
-        ]
+        advice = _ADVICE_LOW
 
     # Add a note if not mountainous
     if not is_mountainous:
@@ -205,7 +526,7 @@ st.markdown(
 st.sidebar.header("Inputs / Settings")
 use_demo = st.sidebar.checkbox("Use demo (no API key required)", value=False)
 
-api_key_input = st.sidebar.text_input("OpenWeatherMap API key (leave blank to use .env)", value=OPENWEATHER_API_KEY if OPENWEATHER_API_KEY else "")
+api_key_input = st.sidebar.text_input("OpenWeatherMap API key (leave blank to use .env)", value=CFG.owm_key if CFG.owm_key else "")
 
 # Location input mode
 loc_mode = st.sidebar.radio("Provide location by:", ("City name", "Latitude & Longitude"))
@@ -222,6 +543,17 @@ else:
     city = None
 
 auto_elev = st.sidebar.checkbox("Auto-detect elevation (requires lat/lon)", value=True)
+use_openmeteo = st.sidebar.checkbox("Use Open-Meteo (no API key, single round trip; lat/lon only)", value=False)
+
+if st.sidebar.button("Refresh weather data (bypass cache)"):
+    _cached_weather_coords.clear()
+    _cached_weather_city.clear()
+    # Drop the per-session memo too, or it would re-serve the old response.
+    st.session_state.pop("last_key", None)
+    st.session_state.pop("last_resp", None)
+    st.session_state.pop("last_ts", None)
+
+
 force_mountain = st.sidebar.checkbox("Force mark as mountainous (override)", value=False)
 elevation_override = None
 
@@ -231,100 +563,132 @@ st.markdown("**How it works:** the app fetches current weather from OpenWeatherM
 if use_demo:
     st.info("Demo mode: no external API calls. Using sample weather for demonstration.")
 else:
-    if not (api_key_input and api_key_input.strip()):
+    if not (api_key_input and api_key_input.strip()) and not use_openmeteo:
         st.warning("No OpenWeatherMap API key provided in the sidebar. You can either enter a key or enable Demo mode. Running without a key will fail to fetch live weather.")
 
 # Run button
 if st.button("Check risk now"):
-    st.spinner("Fetching data...")
-    try:
-        # Decide which API key to use
-        api_key = api_key_input.strip() if api_key_input.strip() else OPENWEATHER_API_KEY
-
-        if use_demo:
-            # Demo sample weather JSON (sunny mountain example)
-            demo_weather = {
-                "weather": [{"main": "Clear", "description": "clear sky"}],
-                "main": {"temp": 4.5},
-                "wind": {"speed": 3.2},
-                "rain": {},
-                "snow": {},
-            }
-            weather_json = demo_weather
-            elevation = 3200  # sample mountain elevation
-            is_mountainous = True
-            st.success("Demo data loaded.")
-        else:
-            if loc_mode == "City name":
-                if not city or not api_key:
-                    st.error("City name provided but no API key available. Please add an API key or enable Demo mode.")
-                    st.stop()
-                weather_json = fetch_weather_by_city(city, api_key)
-                # If city provided, no elevation auto-detect (unless user supply lat/lon separately). Offer manual elevation input.
-                elevation = None
-                is_mountainous = force_mountain or False
+    with st.spinner("Fetching data..."):
+        try:
+            # Decide which API key to use
+            api_key = api_key_input.strip() if api_key_input.strip() else CFG.owm_key
+
+            # Skip all I/O when the inputs that drive fetching are unchanged —
+            # Streamlit reruns the whole script on any widget interaction, and
+            # e.g. toggling force_mountain doesn't need a re-fetch.
+            inputs_key = hashlib.blake2b(
+                repr((loc_mode, city, lat, lon, use_demo, auto_elev, use_openmeteo)).encode(),
+                digest_size=16,
+            ).hexdigest()
+
+            if (
+                st.session_state.get("last_key") == inputs_key
+                and time.time() - st.session_state.get("last_ts", 0) < _WEATHER_TTL_S
+            ):
+                weather_json, elevation = st.session_state["last_resp"]
+                is_mountainous = force_mountain or (
+                    elevation is not None and elevation >= CFG.elev_thresh
+                )
             else:
-                # lat/lon mode
-                if not lat or not lon:
-                    st.error("Please provide both latitude and longitude.")
-                    st.stop()
-                try:
-                    lat_f = float(lat)
-                    lon_f = float(lon)
-                except ValueError:
-                    st.error("Latitude and Longitude must be numeric.")
-                    st.stop()
-                if not api_key:
-                    st.error("No OpenWeatherMap API key available. Please enter one in the sidebar or enable Demo mode.")
-                    st.stop()
-                # fetch weather
-                weather_json = fetch_weather_by_coords(lat_f, lon_f, api_key)
-
-                elevation = None
-                is_mountainous = False
-                if auto_elev:
-                    elev = fetch_elevation(lat_f, lon_f)
-                    if elev is not None:
-                        elevation = elev
-                        is_mountainous = elev >= ELEVATION_MOUNTAIN_THRESHOLD
-                    else:
-                        elevation = None
-                        is_mountainous = False
-
-                # override if user forces
-                if force_mountain:
+                if use_demo:
+                    weather_json = _DEMO_WEATHER
+                    elevation = _DEMO_ELEVATION
                     is_mountainous = True
-
-        # Run analysis
-        result = analyze_risk(weather_json, is_mountainous)
-
-        # Display results
-        st.header(f"Risk level: {result['level']}")
-        st.subheader("Why this assessment?")
-        for r in result["reasons"]:
-            st.write("- " + r)
-
-        st.subheader("Recommendations")
-        for a in result["advice"]:
-            st.write("- " + a)
-
-        st.markdown("---")
-        st.subheader("Weather snapshot (raw values)")
-        raw = result["raw"]
-        st.write(f"Temperature: {raw.get('temp_c', 'N/A')} °C")
-        st.write(f"Weather: {raw.get('weather_main', '')} — {raw.get('weather_desc','')}")
-        st.write(f"Wind speed: {raw.get('wind_speed', 'N/A')} m/s")
-        st.write(f"Rain (1h): {raw.get('rain_1h', 0.0)} mm")
-        st.write(f"Snow (1h): {raw.get('snow_1h', 0.0)} mm")
-        if elevation is not None:
-            st.write(f"Elevation (auto-detected): {elevation} m")
-            st.write(f"Mountainous (threshold {ELEVATION_MOUNTAIN_THRESHOLD} m): {'Yes' if is_mountainous else 'No'}")
-        else:
-            st.write("Elevation: N/A (provide lat/lon and enable auto-detect to fetch elevation).")
-    except requests.HTTPError as he:
-        st.error(f"External API HTTP error: {he}")
-    except Exception as e:
-        st.error(f"An error occurred: {e}")
+                    st.success("Demo data loaded.")
+                else:
+                    if loc_mode == "City name":
+                        if not city or not api_key:
+                            st.error("City name provided but no API key available. Please add an API key or enable Demo mode.")
+                            st.stop()
+                        weather_json = _cached_weather_city(city.strip().lower(), _key_fingerprint(api_key), api_key)
+                        # If city provided, no elevation auto-detect (unless user supply lat/lon separately). Offer manual elevation input.
+                        elevation = None
+                        is_mountainous = force_mountain or False
+                    else:
+                        # lat/lon mode
+                        if not lat or not lon:
+                            st.error("Please provide both latitude and longitude.")
+                            st.stop()
+                        lat_f = _parse_float(lat)
+                        lon_f = _parse_float(lon)
+                        if lat_f is None or lon_f is None:
+                            st.error("Latitude and Longitude must be numeric.")
+                            st.stop()
+                        if not (-90 <= lat_f <= 90) or not (-180 <= lon_f <= 180):
+                            st.error("Latitude must be in [-90, 90] and longitude in [-180, 180].")
+                            st.stop()
+                        if use_openmeteo:
+                            # One request gives both current weather and elevation.
+                            weather_json, elevation = fetch_weather_and_elevation_openmeteo(lat_f, lon_f)
+                            is_mountainous = (elevation is not None) and elevation >= CFG.elev_thresh
+                        else:
+                            if not api_key:
+                                st.error("No OpenWeatherMap API key available. Please enter one in the sidebar or enable Demo mode.")
+                                st.stop()
+                            # Fetch weather and elevation concurrently — they are
+                            # independent round trips, so wall time is the slower of
+                            # the two instead of their sum.
+                            f_weather = _EXECUTOR.submit(
+                                _cached_weather_coords, round(lat_f, 2), round(lon_f, 2), _key_fingerprint(api_key), api_key
+                            )
+                            f_elev = _EXECUTOR.submit(_cached_elevation, round(lat_f, 3), round(lon_f, 3)) if auto_elev else None
+
+                            weather_json = f_weather.result(timeout=12)
+
+                            elevation = None
+                            is_mountainous = False
+                            if f_elev is not None:
+                                try:
+                                    elev = f_elev.result(timeout=10)
+                                except Exception:
+                                    # Elevation is best-effort; don't let it sink the
+                                    # weather result.
+                                    elev = None
+                                if elev is not None:
+                                    elevation = elev
+                                    is_mountainous = elev >= CFG.elev_thresh
+                                else:
+                                    elevation = None
+                                    is_mountainous = False
+
+                        # override if user forces
+                        if force_mountain:
+                            is_mountainous = True
+
+                st.session_state["last_key"] = inputs_key
+                st.session_state["last_resp"] = (weather_json, elevation)
+                st.session_state["last_ts"] = time.time()
+
+            # Run analysis
+            result = analyze_risk(weather_json, is_mountainous)
+
+            # Display results
+            st.header(f"Risk level: {result['level']}")
+            st.subheader("Why this assessment?")
+            for r in result["reasons"]:
+                st.write("- " + r)
+
+            st.subheader("Recommendations")
+            for a in result["advice"]:
+                st.write("- " + a)
+
+            st.markdown("---")
+            st.subheader("Weather snapshot (raw values)")
+            raw = result["raw"]
+            st.write(f"Temperature: {raw.get('temp_c', 'N/A')} °C")
+            st.write(f"Weather: {raw.get('weather_main', '')} — {raw.get('weather_desc','')}")
+            st.write(f"Wind speed: {raw.get('wind_speed', 'N/A')} m/s")
+            st.write(f"Rain (1h): {raw.get('rain_1h', 0.0)} mm")
+            st.write(f"Snow (1h): {raw.get('snow_1h', 0.0)} mm")
+            if elevation is not None:
+                st.write(f"Elevation (auto-detected): {elevation} m")
+                st.write(f"Mountainous (threshold {CFG.elev_thresh} m): {'Yes' if is_mountainous else 'No'}")
+            else:
+                st.write("Elevation: N/A (provide lat/lon and enable auto-detect to fetch elevation).")
+        except _HTTP_ERRORS as he:
+            st.error(f"External API HTTP error: {he}")
+        except Exception as e:
+            st.error(f"An error occurred: {e}")
 
 st.markdown("---")
 st.caption("This app gives a simple, conservative assessment and is for guidance only — always check local authorities and live weather/alerts before travelling.")